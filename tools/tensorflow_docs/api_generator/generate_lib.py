@@ -14,13 +14,15 @@
 # ==============================================================================
 """Generate tensorflow.org style API Reference docs for a Python module."""
 
-import collections
+import concurrent.futures
+import errno
+import multiprocessing
 import os
 import pathlib
 import shutil
 import tempfile
 
-from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, Union
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Type, Union
 
 from tensorflow_docs.api_generator import config
 from tensorflow_docs.api_generator import doc_generator_visitor
@@ -34,25 +36,170 @@ from tensorflow_docs.api_generator.pretty_docs import docs_for_object
 
 from tensorflow_docs.api_generator.report import utils
 
-import yaml
 
-# Used to add a collections.OrderedDict representer to yaml so that the
-# dump doesn't contain !!OrderedDict yaml tags.
-# Reference: https://stackoverflow.com/a/21048064
-# Using a normal dict doesn't preserve the order of the input dictionary.
-_mapping_tag = yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG
+# Symbols under these prefixes are left out of the api report.
+_SKIP_METRICS_PREFIXES = ('tf.compat.v', 'tf.keras.backend', 'tf.numpy',
+                          'tf.experimental.numpy')
 
 
-def dict_representer(dumper, data):
-  return dumper.represent_dict(data.items())
+# Set in each worker process by `_init_render_worker`.
+_render_worker_kwargs: Dict[str, Any] = {}
 
 
-def dict_constructor(loader, node):
-  return collections.OrderedDict(loader.construct_pairs(node))
+def _render_page(
+    api_node: doc_generator_visitor.ApiTreeNode,
+    *,
+    parser_config: config.ParserConfig,
+    extra_docs: Optional[Dict[int, str]],
+    search_hints: bool,
+    page_builder_classes: Optional[docs_for_object.PageBuilderDict],
+    api_report: Optional[utils.ApiReport],
+) -> str:
+  """Generates the page text for `api_node`, filling `api_report` if given."""
+  full_name = api_node.full_name
+  need_metrics = (
+      api_report is not None and
+      not full_name.startswith(_SKIP_METRICS_PREFIXES))
+
+  # Generate docs for `py_object`, resolving references.
+  #
+  # Only the page text is needed after this. Drop the `PageInfo` (which can be
+  # large) right away, unless the report still needs it.
+  try:
+    page_info = docs_for_object.docs_for_object(
+        api_node=api_node,
+        parser_config=parser_config,
+        extra_docs=extra_docs,
+        search_hints=search_hints,
+        page_builder_classes=page_builder_classes)
+    page_text = page_info.page_text
+
+    if need_metrics:
+      api_report.fill_metrics(page_info)
+    del page_info
+  except Exception as e:
+    raise ValueError(
+        f'Failed to generate docs for symbol: `{full_name}`') from e
+
+  return page_text
+
+
+def _init_render_worker(render_kwargs: Dict[str, Any]):
+  _render_worker_kwargs.update(render_kwargs)
 
 
-yaml.add_representer(collections.OrderedDict, dict_representer)
-yaml.add_constructor(_mapping_tag, dict_constructor)
+def _render_page_in_worker(path: doc_generator_visitor.ApiPath):
+  """Renders the page at `path` using the state set by `_init_render_worker`."""
+  kwargs = dict(_render_worker_kwargs)
+  gen_report = kwargs.pop('gen_report')
+  api_node = kwargs['parser_config'].api_tree[path]
+
+  api_report = utils.ApiReport() if gen_report else None
+  page_text = _render_page(api_node, api_report=api_report, **kwargs)
+
+  # The generated proto classes can't be pickled, send them serialized.
+  symbol_metrics = []
+  if api_report is not None:
+    symbol_metrics = [
+        metric.SerializeToString()
+        for metric in api_report.api_report.symbol_metric
+    ]
+
+  return page_text, symbol_metrics
+
+
+def _render_pages(
+    api_nodes: List[doc_generator_visitor.ApiTreeNode],
+    *,
+    api_report: Optional[utils.ApiReport],
+    num_workers: Optional[int],
+    **render_kwargs,
+) -> Iterator[str]:
+  """Yields the page text for each of the `api_nodes`, in order.
+
+  With `num_workers > 1` the pages are rendered in a pool of forked processes.
+  Each worker inherits the `parser_config` when it is forked, so only the api
+  paths, the page text, and the report metrics are pickled. Otherwise the pages
+  are rendered here.
+
+  Args:
+    api_nodes: The nodes to render.
+    api_report: If not None, the metrics for each page are added to this report.
+    num_workers: The number of processes to use. `None` means one per cpu.
+    **render_kwargs: Passed through to `_render_page`.
+
+  Yields:
+    The page text for each node.
+  """
+  if num_workers is None:
+    num_workers = os.cpu_count() or 1
+
+  # The workers need to inherit the `parser_config` (it contains modules, which
+  # can't be pickled), so this only works if we can fork.
+  if (num_workers <= 1 or len(api_nodes) <= 1 or
+      'fork' not in multiprocessing.get_all_start_methods()):
+    for api_node in api_nodes:
+      yield _render_page(api_node, api_report=api_report, **render_kwargs)
+    return
+
+  worker_kwargs = dict(render_kwargs, gen_report=api_report is not None)
+  with concurrent.futures.ProcessPoolExecutor(
+      max_workers=num_workers,
+      mp_context=multiprocessing.get_context('fork'),
+      initializer=_init_render_worker,
+      initargs=(worker_kwargs,)) as executor:
+    results = executor.map(
+        _render_page_in_worker, [api_node.path for api_node in api_nodes],
+        chunksize=32)
+    for page_text, symbol_metrics in results:
+      for metric in symbol_metrics:
+        api_report.api_report.symbol_metric.add().ParseFromString(metric)
+      yield page_text
+
+
+def _write_file(path: Union[str, os.PathLike], data: bytes):
+  """Writes `data` to `path` with a single open/write/close."""
+  fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+  try:
+    view = memoryview(data)
+    while view:
+      view = view[os.write(fd, view):]
+  finally:
+    os.close(fd)
+
+
+class _BatchedWriter:
+  """Writes files from a small thread pool, and reports errors on `drain`.
+
+  Each page is an independent small file, so the writes are submitted as they
+  are produced and overlap with rendering the next page (file writes release
+  the GIL). The parent directories must exist before a write is submitted.
+  """
+
+  def __init__(self, max_workers: int = 8):
+    self._executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_workers)
+    self._pending = []
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info):
+    self._executor.shutdown(wait=True)
+
+  def submit(self, path: str, data: bytes, full_name: str):
+    future = self._executor.submit(_write_file, path, data)
+    self._pending.append((future, path, full_name))
+
+  def drain(self):
+    """Waits for all submitted writes, raising the first failure."""
+    pending, self._pending = self._pending, []
+    for future, path, full_name in pending:
+      try:
+        future.result()
+      except OSError as e:
+        raise OSError('Cannot write documentation for '
+                      f'{full_name} to {os.path.dirname(path)}') from e
 
 
 def write_docs(
@@ -68,7 +215,8 @@ def write_docs(
     gen_report: bool = True,
     extra_docs: Optional[Dict[int, str]] = None,
     page_builder_classes: Optional[docs_for_object.PageBuilderDict] = None,
-):
+    num_workers: Optional[int] = 1,
+) -> List[pathlib.Path]:
   """Write previously extracted docs to disk.
 
   Write a docs page for each symbol included in the indices of parser_config to
@@ -98,6 +246,13 @@ def write_docs(
       Pass those docs like: `extra_docs={id(obj): "docs"}`
     page_builder_classes: A optional dict of `{ObjectType:Type[PageInfo]}` for
         overriding the default page builder classes.
+    num_workers: The number of processes used to render the pages. `None` uses
+      one per cpu. Parallel rendering forks the current process, so it is only
+      available on platforms that support `fork`.
+
+  Returns:
+    The top level files and directories written to `output_dir`, in sorted
+    order.
 
   Raises:
     ValueError: if `output_dir` is not an absolute path
@@ -111,59 +266,67 @@ def write_docs(
                      f"    output_dir='{output_dir}'")
   output_dir.mkdir(parents=True, exist_ok=True)
 
-  # Collect redirects for an api _redirects.yaml file.
+  # Collect (from, to) redirects for an api _redirects.yaml file.
   redirects = []
+  site_prefix = site_path.as_posix().rstrip('/') + '/'
 
   api_report = None
   if gen_report:
     api_report = utils.ApiReport()
 
-  # Parse and write Markdown pages, resolving cross-links (`tf.symbol`).
-  num_docs_output = 0
-  for api_node in parser_config.api_tree.iter_nodes():
-    full_name = api_node.full_name
-
-    if api_node.output_type() is api_node.OutputType.FRAGMENT:
-      continue
-
-    # Generate docs for `py_object`, resolving references.
-    try:
-      page_info = docs_for_object.docs_for_object(
-          api_node=api_node,
-          parser_config=parser_config,
-          extra_docs=extra_docs,
-          search_hints=search_hints,
-          page_builder_classes=page_builder_classes)
-
-      if api_report is not None and not full_name.startswith(
-          ('tf.compat.v', 'tf.keras.backend', 'tf.numpy',
-           'tf.experimental.numpy')):
-        api_report.fill_metrics(page_info)
-    except Exception as e:
-      raise ValueError(
-          f'Failed to generate docs for symbol: `{full_name}`') from e
-
-    path = output_dir / parser.documentation_path(full_name)
+  # The `api_tree` has one node per object, aliases are only recorded on the
+  # node. So each object is rendered once, no matter how many aliases it has.
+  api_nodes = [
+      api_node for api_node in parser_config.api_tree.iter_nodes()
+      if api_node.output_type() is not api_node.OutputType.FRAGMENT
+  ]
 
+  # Parse and write Markdown pages, resolving cross-links (`tf.symbol`).
+  page_texts = _render_pages(
+      api_nodes,
+      api_report=api_report,
+      num_workers=num_workers,
+      parser_config=parser_config,
+      extra_docs=extra_docs,
+      search_hints=search_hints,
+      page_builder_classes=page_builder_classes)
+
+  doc_paths = [
+      parser.documentation_path(api_node.full_name) for api_node in api_nodes
+  ]
+  # Plain strings are much cheaper than `pathlib` objects for this many paths.
+  output_dir_str = os.fspath(output_dir)
+  paths = [os.path.join(output_dir_str, doc_path) for doc_path in doc_paths]
+
+  # Track the top level outputs, so callers don't need to re-scan `output_dir`.
+  top_level_names = {doc_path.split('/', 1)[0] for doc_path in doc_paths}
+  top_level_names.add(pathlib.PurePosixPath(root_module_name).parts[0])
+
+  # Create each directory once (parents first), instead of once per page.
+  for parent in sorted({os.path.dirname(path) for path in paths}, key=len):
     try:
-      path.parent.mkdir(exist_ok=True, parents=True)
-      path.write_text(page_info.page_text, encoding='utf-8')
-      num_docs_output += 1
+      os.makedirs(parent, exist_ok=True)
     except OSError as e:
-      raise OSError('Cannot write documentation for '
-                    f'{full_name} to {path.parent}') from e
+      raise OSError(f'Cannot create documentation directory {parent}') from e
+
+  num_docs_output = 0
+  with _BatchedWriter() as writer:
+    # `page_texts` goes first, so that it is run to completion (including its
+    # cleanup) before `zip` stops.
+    for page_text, api_node, path in zip(page_texts, api_nodes, paths):
+      full_name = api_node.full_name
 
-    duplicates = parser_config.duplicates.get(full_name, [])
-    if not duplicates:
-      continue
+      writer.submit(path, page_text.encode('utf-8'), full_name)
+      num_docs_output += 1
 
-    duplicates = [item for item in duplicates if item != full_name]
+      duplicates = parser_config.duplicates.get(full_name)
+      if gen_redirects and duplicates:
+        to_path = site_prefix + full_name.replace('.', '/')
+        redirects.extend((site_prefix + dup.replace('.', '/'), to_path)
+                         for dup in duplicates
+                         if dup != full_name)
 
-    if gen_redirects:
-      for dup in duplicates:
-        from_path = site_path / dup.replace('.', '/')
-        to_path = site_path / full_name.replace('.', '/')
-        redirects.append({'from': str(from_path), 'to': str(to_path)})
+    writer.drain()
 
   if api_report is not None:
     api_report.write(output_dir / root_module_name / 'api_report.pb')
@@ -184,22 +347,28 @@ def write_docs(
     toc.write(toc_path)
 
   if redirects and gen_redirects:
-    redirects_dict = {
-        'redirects': sorted(redirects, key=lambda redirect: redirect['from'])
-    }
+    # Sorting the whole `(from, to)` tuples keeps the output deterministic.
+    redirects = sorted(set(redirects))
 
+    # All the paths are built from python identifiers, so they never need
+    # quoting. Writing the entries directly is much faster than `yaml.dump`.
     api_redirects_path = output_dir / root_module_name / '_redirects.yaml'
     with open(api_redirects_path, 'w') as redirect_file:
-      yaml.dump(redirects_dict, redirect_file, default_flow_style=False)
+      redirect_file.write('redirects:\n')
+      for from_path, to_path in redirects:
+        redirect_file.write(f'- from: {from_path}\n  to: {to_path}\n')
 
   # Write a global index containing all full names with links.
   with open(output_dir / root_module_name / 'all_symbols.md', 'w') as f:
     global_index = parser.generate_global_index(
         root_title, parser_config.index, parser_config.reference_resolver)
+    # Write the prefix separately, to avoid copying the whole index.
     if not search_hints:
-      global_index = 'robots: noindex\n' + global_index
+      f.write('robots: noindex\n')
     f.write(global_index)
 
+  return [output_dir / name for name in sorted(top_level_names)]
+
 
 def add_dict_to_dict(add_from, add_to):
   for key in add_from:
@@ -209,6 +378,19 @@ def add_dict_to_dict(add_from, add_to):
       add_to[key] = add_from[key]
 
 
+# The default filters that don't depend on the `extract` arguments. Apart from
+# `add_proto_fields` these only remove children, so their order relative to the
+# configured filters doesn't matter.
+_DEFAULT_STATELESS_FILTERS = (
+    public_api.filter_module_all,
+    public_api.add_proto_fields,
+    public_api.filter_builtin_modules,
+    public_api.filter_private_symbols,
+    public_api.filter_doc_controls_skip,
+    public_api.ignore_typing,
+)
+
+
 def extract(
     py_modules,
     base_dir,
@@ -258,21 +440,16 @@ def extract(
     filters = [
         # filter the api.
         public_api.FailIfNestedTooDeep(10),
-        public_api.filter_module_all,
-        public_api.add_proto_fields,
-        public_api.filter_builtin_modules,
-        public_api.filter_private_symbols,
+        *_DEFAULT_STATELESS_FILTERS,
         public_api.FilterBaseDirs(base_dir),
         public_api.FilterPrivateMap(private_map),
-        public_api.filter_doc_controls_skip,
-        public_api.ignore_typing
     ]
   else:
     filters = []
 
   accumulator = visitor_cls()
   traverse.traverse(
-      py_module, filters + callbacks, accumulator, root_name=short_name)
+      py_module, [*filters, *callbacks], accumulator, root_name=short_name)
 
   accumulator.build()
   return accumulator
@@ -281,6 +458,47 @@ def extract(
 EXCLUDED = set(['__init__.py', 'OWNERS', 'README.txt'])
 
 
+def _parallel_copytree(src: Union[str, os.PathLike],
+                       dst: Union[str, os.PathLike],
+                       max_workers: int = 8):
+  """Like `shutil.copytree`, but copies the files from a thread pool.
+
+  The docs are thousands of small files, so copying them one at a time is
+  dominated by waiting on the filesystem.
+
+  Args:
+    src: The directory to copy.
+    dst: The destination. It may already exist, e.g. as an empty mount point.
+    max_workers: The number of threads to copy the files with.
+  """
+  src = os.fspath(src)
+  dst = os.fspath(dst)
+
+  # Create the directories up front, so the copies don't depend on each other.
+  #
+  # Like `copytree(symlinks=False)`, symlinks are followed and their targets are
+  # copied, so a symlinked directory becomes a real one.
+  dir_pairs = []
+  src_files = []
+  dst_files = []
+  for src_dir, _, file_names in os.walk(src, followlinks=True):
+    dst_dir = os.path.normpath(os.path.join(dst, os.path.relpath(src_dir, src)))
+    os.makedirs(dst_dir, exist_ok=True)
+    dir_pairs.append((src_dir, dst_dir))
+    for file_name in file_names:
+      src_files.append(os.path.join(src_dir, file_name))
+      dst_files.append(os.path.join(dst_dir, file_name))
+
+  with concurrent.futures.ThreadPoolExecutor(
+      max_workers=max_workers) as executor:
+    # Consume the results to raise any errors.
+    list(executor.map(shutil.copy2, src_files, dst_files))
+
+  # Like `copytree`, copy the directory stats after their contents are written.
+  for src_dir, dst_dir in dir_pairs:
+    shutil.copystat(src_dir, dst_dir)
+
+
 class DocGenerator:
   """Main entry point for generating docs."""
 
@@ -302,6 +520,7 @@ class DocGenerator:
       gen_report: bool = True,
       extra_docs: Optional[Dict[int, str]] = None,
       page_builder_classes: Optional[docs_for_object.PageBuilderDict] = None,
+      num_workers: Optional[int] = 1,
   ):
     """Creates a doc-generator.
 
@@ -339,6 +558,8 @@ class DocGenerator:
         Pass those docs like: `extra_docs={id(obj): "docs"}`
       page_builder_classes: An optional dict of `{ObjectType:Type[PageInfo]}`
         for overriding the default page builder classes.
+      num_workers: The number of processes used to render the pages. `None`
+        uses one per cpu. See `write_docs`.
     """
     self._root_title = root_title
     self._py_modules = py_modules
@@ -381,6 +602,7 @@ class DocGenerator:
     self._gen_report = gen_report
     self._extra_docs = extra_docs
     self._page_builder_classes = page_builder_classes
+    self._num_workers = num_workers
 
   def make_reference_resolver(self, visitor):
     return reference_resolver_lib.ReferenceResolver.from_visitor(
@@ -430,12 +652,27 @@ class DocGenerator:
     Args:
       output_dir: Where to write the resulting docs.
     """
-    workdir = pathlib.Path(tempfile.mkdtemp())
+    output_dir = os.path.abspath(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
 
+    # Build in a hidden sibling of `output_dir`, so that the results are
+    # (usually) on the same filesystem and can be moved into place with a
+    # rename, but a killed build doesn't leave its scratch files in the docs.
+    workdir = pathlib.Path(
+        tempfile.mkdtemp(
+            dir=os.path.dirname(output_dir),
+            prefix='.' + os.path.basename(output_dir)))
+    try:
+      self._build_in_workdir(output_dir, workdir)
+    finally:
+      shutil.rmtree(workdir, ignore_errors=True)
+
+  def _build_in_workdir(self, output_dir, workdir):
+    """Builds the docs in `workdir` and then publishes them to `output_dir`."""
     # Extract the python api from the _py_modules
     parser_config = self.run_extraction()
     work_py_dir = workdir / 'api_docs/python'
-    write_docs(
+    work_paths = write_docs(
         output_dir=str(work_py_dir),
         parser_config=parser_config,
         yaml_toc=self._yaml_toc,
@@ -447,6 +684,7 @@ class DocGenerator:
         gen_report=self._gen_report,
         extra_docs=self._extra_docs,
         page_builder_classes=self._page_builder_classes,
+        num_workers=self._num_workers,
     )
 
     if self.api_cache:
@@ -454,8 +692,6 @@ class DocGenerator:
           str(work_py_dir / self._short_name.replace('.', '/') /
               '_api_cache.json'))
 
-    os.makedirs(output_dir, exist_ok=True)
-
     # Typical results are something like:
     #
     # out_dir/
@@ -466,15 +702,22 @@ class DocGenerator:
     #    index.md
     #    {short_name}.md
     #
-    # Copy the top level files to the `{output_dir}/`, delete and replace the
-    # `{output_dir}/{short_name}/` directory.
-
-    for work_path in work_py_dir.glob('*'):
+    # Move (or copy) the top level files to the `{output_dir}/`, delete and
+    # replace the `{output_dir}/{short_name}/` directory.
+    for work_path in work_paths:
       out_path = pathlib.Path(output_dir) / work_path.name
       out_path.parent.mkdir(exist_ok=True, parents=True)
 
-      if work_path.is_file():
-        shutil.copy2(work_path, out_path)
-      elif work_path.is_dir():
+      if work_path.is_dir():
         shutil.rmtree(out_path, ignore_errors=True)
-        shutil.copytree(work_path, out_path)
+
+      try:
+        os.replace(work_path, out_path)
+      except OSError as e:
+        # `out_path` is on another filesystem (e.g. it's a mount point).
+        if e.errno != errno.EXDEV:
+          raise
+        if work_path.is_dir():
+          _parallel_copytree(work_path, out_path)
+        else:
+          shutil.copy2(work_path, out_path)
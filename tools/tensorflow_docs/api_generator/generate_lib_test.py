@@ -14,12 +14,14 @@
 # ==============================================================================
 """Tests for doc generator traversal."""
 
+import errno
 import os
 import pathlib
 import sys
 import tempfile
 import textwrap
 import types
+from unittest import mock
 
 from absl import flags
 from absl.testing import absltest
@@ -75,21 +77,25 @@ class GenerateTest(absltest.TestCase):
     self.workdir = os.path.join(self._BASE_DIR, self.id())
     os.makedirs(self.workdir)
 
-  def get_test_objects(self):
-    # These are all mutable objects, so rebuild them for each test.
-    # Don't cache the objects.
-    tf = types.ModuleType('tf')
-    tf.__file__ = __file__
-    tf.TestModule = types.ModuleType('module')
-    tf.test_function = test_function
-    tf.TestModule.test_function = test_function
-    tf.TestModule.TestClass = TestClass
-
-    generator = generate_lib.DocGenerator(
+  def _make_generator(self, tf=None):
+    """Returns a `DocGenerator` for `tf`, or for the standard test module."""
+    if tf is None:
+      tf = types.ModuleType('tf')
+      tf.__file__ = __file__
+      tf.TestModule = types.ModuleType('module')
+      tf.test_function = test_function
+      tf.TestModule.test_function = test_function
+      tf.TestModule.TestClass = TestClass
+
+    return generate_lib.DocGenerator(
         root_title='TensorFlow',
         py_modules=[('tf', tf)],
         code_url_prefix='https://tensorflow.org/')
 
+  def get_test_objects(self):
+    # These are all mutable objects, so rebuild them for each test.
+    # Don't cache the objects.
+    generator = self._make_generator()
     parser_config = generator.run_extraction()
 
     return parser_config.reference_resolver, parser_config
@@ -99,12 +105,14 @@ class GenerateTest(absltest.TestCase):
 
     output_dir = pathlib.Path(self.workdir)
 
-    generate_lib.write_docs(
+    top_level_paths = generate_lib.write_docs(
         output_dir=output_dir,
         parser_config=parser_config,
         root_module_name='tf',
         yaml_toc=True)
 
+    self.assertEqual(top_level_paths, sorted(output_dir.iterdir()))
+
     # Check redirects
     redirects_file = output_dir / 'tf/_redirects.yaml'
     self.assertTrue(redirects_file.exists())
@@ -146,6 +154,138 @@ class GenerateTest(absltest.TestCase):
     # Make sure that duplicates are not written
     self.assertTrue((output_dir / 'tf/TestModule/test_function.md').exists())
 
+  def test_import_does_not_change_global_yaml_state(self):
+    # `generate_lib` used to register an `OrderedDict` constructor with PyYAML,
+    # which changed what `yaml.load` returns for every importer.
+    loaded = yaml.load('a: 1', Loader=yaml.FullLoader)
+    self.assertIs(type(loaded), dict)
+
+  def test_build(self):
+    generator = self._make_generator()
+
+    output_dir = pathlib.Path(self.workdir) / 'out'
+    # Stale outputs are replaced.
+    (output_dir / 'tf').mkdir(parents=True)
+    (output_dir / 'tf/stale.md').write_text('stale')
+
+    generator.build(output_dir)
+
+    self.assertCountEqual(
+        [p.name for p in output_dir.iterdir()], ['tf', 'tf.md'])
+    self.assertTrue((output_dir / 'tf/TestModule.md').exists())
+    self.assertTrue((output_dir / 'tf/_api_cache.json').exists())
+    self.assertFalse((output_dir / 'tf/stale.md').exists())
+    # The temporary build directory is cleaned up.
+    self.assertCountEqual(os.listdir(output_dir.parent), [output_dir.name])
+
+  def test_build_cross_device(self):
+    generator = self._make_generator()
+
+    output_dir = pathlib.Path(self.workdir) / 'out'
+    (output_dir / 'tf').mkdir(parents=True)
+    (output_dir / 'tf/stale.md').write_text('stale')
+
+    cross_device = OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+    with mock.patch.object(os, 'replace', side_effect=cross_device):
+      generator.build(output_dir)
+
+    self.assertCountEqual(
+        [p.name for p in output_dir.iterdir()], ['tf', 'tf.md'])
+    self.assertTrue((output_dir / 'tf/TestModule.md').exists())
+    self.assertFalse((output_dir / 'tf/stale.md').exists())
+
+  def test_build_relative_output_dir(self):
+    generator = self._make_generator()
+
+    self.addCleanup(os.chdir, os.getcwd())
+    os.chdir(self.workdir)
+
+    generator.build('rel_out')
+
+    output_dir = pathlib.Path(self.workdir) / 'rel_out'
+    self.assertCountEqual(
+        [p.name for p in output_dir.iterdir()], ['tf', 'tf.md'])
+    self.assertTrue((output_dir / 'tf/TestModule.md').exists())
+
+  def test_parallel_copytree(self):
+    src = pathlib.Path(self.workdir) / 'src'
+    (src / 'a/b').mkdir(parents=True)
+    (src / 'empty').mkdir()
+    (src / 'top.md').write_text('top')
+    (src / 'a/b/deep.md').write_text('deep')
+    (src / 'link').symlink_to('a/b', target_is_directory=True)
+
+    dst = pathlib.Path(self.workdir) / 'dst'
+    generate_lib._parallel_copytree(src, dst, max_workers=2)
+
+    self.assertCountEqual(
+        [p.relative_to(dst).as_posix() for p in dst.rglob('*')],
+        ['a', 'a/b', 'a/b/deep.md', 'empty', 'link', 'link/deep.md',
+         'top.md'])
+    self.assertEqual((dst / 'a/b/deep.md').read_text(), 'deep')
+    # Symlinked directories are copied, like `copytree(symlinks=False)`.
+    self.assertFalse((dst / 'link').is_symlink())
+    self.assertEqual((dst / 'link/deep.md').read_text(), 'deep')
+
+  def test_aliases_are_rendered_once(self):
+    rendered = []
+
+    class RecordingFunctionPageInfo(function_page.FunctionPageInfo):
+
+      def docs_for_object(self):
+        rendered.append(self.full_name)
+        super().docs_for_object()
+
+    def aliased_function():
+      """Docstring for aliased_function."""
+
+    doc_controls.set_custom_page_builder_cls(aliased_function,
+                                             RecordingFunctionPageInfo)
+
+    tf = types.ModuleType('tf')
+    tf.__file__ = __file__
+    tf.sub = types.ModuleType('sub')
+    tf.aliased_function = aliased_function
+    tf.sub.aliased_function = aliased_function
+
+    parser_config = self._make_generator(tf).run_extraction()
+
+    generate_lib.write_docs(
+        output_dir=pathlib.Path(self.workdir),
+        parser_config=parser_config,
+        root_module_name='tf',
+        yaml_toc=False)
+
+    self.assertLen(rendered, 1)
+
+  def test_write_parallel(self):
+    _, parser_config = self.get_test_objects()
+
+    serial_dir = pathlib.Path(self.workdir) / 'serial'
+    parallel_dir = pathlib.Path(self.workdir) / 'parallel'
+
+    generate_lib.write_docs(
+        output_dir=serial_dir,
+        parser_config=parser_config,
+        root_module_name='tf',
+        yaml_toc=True)
+    generate_lib.write_docs(
+        output_dir=parallel_dir,
+        parser_config=parser_config,
+        root_module_name='tf',
+        yaml_toc=True,
+        num_workers=2)
+
+    serial_files = sorted(
+        p.relative_to(serial_dir) for p in serial_dir.rglob('*.md'))
+    parallel_files = sorted(
+        p.relative_to(parallel_dir) for p in parallel_dir.rglob('*.md'))
+    self.assertEqual(serial_files, parallel_files)
+
+    for rel_path in serial_files:
+      self.assertEqual((serial_dir / rel_path).read_text(),
+                       (parallel_dir / rel_path).read_text())
+
 
 if __name__ == '__main__':
   absltest.main()
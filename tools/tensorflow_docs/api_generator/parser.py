@@ -16,6 +16,7 @@
 
 import dataclasses
 import enum
+import functools
 import inspect
 import pathlib
 import posixpath
@@ -50,6 +51,7 @@ def is_class_attr(full_name, index):
   return False
 
 
+@functools.lru_cache(maxsize=None)
 def documentation_path(full_name, is_fragment=False):
   """Returns the file path for the documentation for the given API symbol.
 
@@ -58,6 +60,9 @@ def documentation_path(full_name, is_fragment=False):
   Documentation files are organized into directories that mirror the python
   module/class structure.
 
+  This is called for every page and every cross-link, so the results are
+  cached.
+
   Args:
     full_name: Fully qualified name of a library symbol.
     is_fragment: If `False` produce a page link (`tf.a.b.c` -->
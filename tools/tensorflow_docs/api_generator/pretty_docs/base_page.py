@@ -108,6 +108,11 @@ class PageInfo:
   """
   DEFAULT_BUILDER_CLASS: ClassVar[Type[PageBuilder]] = TemplatePageBuilder
 
+  # One of these is created for every page, skip the per-instance `__dict__`.
+  __slots__ = ('api_node', 'full_name', 'py_object', '_extra_docs',
+               'search_hints', 'parser_config', '_defined_in', '_aliases',
+               '_doc', '_page_text')
+
   def __init__(
       self,
       api_node,
@@ -184,9 +189,19 @@ class PageInfo:
       self._page_text = self.build()
     return self._page_text
 
+  def _attributes(self) -> Dict[str, Any]:
+    """Returns the attributes from the `__slots__` and any `__dict__`."""
+    attributes = {}
+    for cls in type(self).__mro__:
+      for name in getattr(cls, '__slots__', ()):
+        if hasattr(self, name):
+          attributes[name] = getattr(self, name)
+    attributes.update(getattr(self, '__dict__', {}))
+    return attributes
+
   def __eq__(self, other):
     if isinstance(other, PageInfo):
-      return self.__dict__ == other.__dict__
+      return self._attributes() == other._attributes()
     else:
       return NotImplemented
 
@@ -127,6 +127,9 @@ class ClassPageInfo(base_page.PageInfo):
   """
   DEFAULT_BUILDER_CLASS = ClassPageBuilder
 
+  __slots__ = ('_namedtuplefields', '_properties', '_bases', '_methods',
+               '_classes', '_other_members', 'attr_block')
+
   def __init__(self, *, api_node, **kwargs):
     """Initialize a ClassPageInfo.
 
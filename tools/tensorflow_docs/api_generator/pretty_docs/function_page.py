@@ -50,6 +50,8 @@ class FunctionPageInfo(base_page.PageInfo):
   """
   DEFAULT_BUILDER_CLASS = FunctionPageBuilder
 
+  __slots__ = ('_signature', '_decorators')
+
   def __init__(self, *, api_node, **kwargs):
     """Initialize a FunctionPageInfo.
 
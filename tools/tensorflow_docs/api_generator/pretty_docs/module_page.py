@@ -62,6 +62,9 @@ class ModulePageInfo(base_page.PageInfo):
   """
   DEFAULT_BUILDER_CLASS = ModulePageBuilder
 
+  __slots__ = ('_modules', '_classes', '_functions', '_other_members',
+               '_type_alias')
+
   def __init__(self, *, api_node, **kwargs):
     """Initialize a `ModulePageInfo`.
 
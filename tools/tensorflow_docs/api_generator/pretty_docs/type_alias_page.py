@@ -50,6 +50,8 @@ class TypeAliasPageInfo(base_page.PageInfo):
   """
   DEFAULT_BUILDER_CLASS = TypeAliasPageBuilder
 
+  __slots__ = ('_signature',)
+
   def __init__(self, *, api_node, **kwargs) -> None:
     """Initialize a `TypeAliasPageInfo`.
 
@@ -26,6 +26,11 @@ from typing import Optional, Union
 
 from tensorflow_docs.api_generator import parser
 
+try:
+  import orjson  # pylint: disable=g-import-not-at-top
+except ImportError:
+  orjson = None
+
 
 class TFDocsError(Exception):
   pass
@@ -179,7 +184,7 @@ class ReferenceResolver:
   @classmethod
   def from_json_file(cls, filepath):
     """Initialize the reference resolver via _api_cache.json."""
-    with open(filepath) as f:
+    with open(filepath, encoding='utf-8') as f:
       json_dict = json.load(f)
 
     return cls(**json_dict)
@@ -245,6 +250,9 @@ class ReferenceResolver:
   def to_json_file(self, filepath):
     """Converts the ReferenceResolver to json and writes it to the specified file.
 
+    Uses `orjson` if it's installed, it's several times faster than `json` for
+    large APIs and produces the same file.
+
     Args:
       filepath: The file path to write the json to.
     """
@@ -264,9 +272,17 @@ class ReferenceResolver:
       # recognized by the constructor.
       json_dict[key.lstrip('_')] = value
 
-    with open(filepath, 'w') as f:
-      json.dump(json_dict, f, indent=2, sort_keys=True)
-      f.write('\n')
+    if orjson is not None:
+      with open(filepath, 'wb') as f:
+        f.write(
+            orjson.dumps(
+                json_dict,
+                option=(orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS |
+                        orjson.OPT_APPEND_NEWLINE)))
+    else:
+      with open(filepath, 'w') as f:
+        json.dump(json_dict, f, indent=2, sort_keys=True)
+        f.write('\n')
 
   def replace_references(self, string, full_name=None):
     """Replace `tf.symbol` references with links to symbol's documentation page.
@@ -278,12 +278,14 @@ class TocBuilder:
     if doc_controls.is_deprecated(api_node.py_object):
       return True
 
-    decorator_list = signature.extract_decorators(api_node.py_object)
-    if any('deprecat' in dec for dec in decorator_list):
-      docstring = getattr(api_node.py_object, '__doc__') or ''
-      return 'THIS FUNCTION IS DEPRECATED' in docstring
+    # Check the docstring first, it's much cheaper than parsing the source to
+    # find the decorators.
+    docstring = getattr(api_node.py_object, '__doc__', None) or ''
+    if 'THIS FUNCTION IS DEPRECATED' not in docstring:
+      return False
 
-    return False
+    decorator_list = signature.extract_decorators(api_node.py_object)
+    return any('deprecat' in dec for dec in decorator_list)
 
 
 class FlatModulesTocBuilder(TocBuilder):